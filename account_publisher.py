@@ -1,115 +1,135 @@
-import os
+import asyncio
+import hashlib
+import httpx
+import json
+import logging
+import signal
+import sys
 import time
-from datetime import datetime
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from datetime import datetime, timezone
 from account_fetcher import get_account_data
+from clock_fetcher import clock_driver, market_is_open
 from logger_config import get_logger
-import logging
-
-# Load environment variables (only in development)
-if os.path.exists('.env'):
-    load_dotenv()
+from shared_http import call_with_retry
+from postgrest.types import ReturnMethod
+from supabase_pool import batched_insert
 
 # Get module logger
 logger = get_logger('account_publisher')
 
-# Disable HTTP request logging
-logging.getLogger('httpx').setLevel(logging.WARNING)
+# Number of account snapshots to buffer before writing them in a single insert
+BATCH_SIZE = 10
 
-# Initialize Supabase clients
-try:
-    SUPABASE_URL = os.environ['SUPABASE_URL']
-    SUPABASE_SERVICE_ROLE_KEY = os.environ['SUPABASE_SERVICE_ROLE_KEY']
-    SUPABASE_ANON_KEY = os.environ['NEXT_PUBLIC_SUPABASE_ANON_KEY']
-except KeyError as e:
-    logger.error(f"Missing required environment variable: {e}")
-    raise
+# Account snapshots waiting to be written to Supabase
+pending: list[dict] = []
 
-# Client for reading clock data (public access)
-supabase_reader = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-# Client for writing account data (authenticated access)
-supabase_writer = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Hash of the last snapshot queued for publishing, used to skip unchanged ones
+_last_snapshot_hash: bytes | None = None
 
-def get_market_status():
-    """Get the current market status from the clock_snapshot table"""
-    try:
-        # Get the latest clock snapshot using anon key
-        logger.info("[ACCOUNT] Fetching market status from Supabase")
-        response = supabase_reader.table('clock_snapshot').select('*').order('created_at', desc=True).limit(1).execute()
-        if response.data:
-            return response.data[0]
-        else:
-            logger.error("[ACCOUNT] No clock data found in database")
-            return None
-    except Exception as e:
-        logger.error(f"[ACCOUNT] Error fetching market status from database: {str(e)}")
-        return None
+def snapshot_hash(account_data):
+    """Hash an account snapshot so identical consecutive snapshots can be detected"""
+    payload = json.dumps(account_data, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
 
-def cleanup_old_snapshots():
-    """Delete all but the most recent account snapshot when market is closed"""
+def flush_pending():
+    """Insert all buffered account snapshots in a single request"""
+    if not pending:
+        return
+    
+    # Take the batch out first, so a shutdown flush racing this one can't send it again
+    batch = pending[:]
+    pending.clear()
+    
+    logger.info(f"[ACCOUNT] Publishing {len(batch)} account snapshots to Supabase")
     try:
-        logger.info("[ACCOUNT] Cleaning up old account snapshots")
-        # Get the latest snapshot ID
-        response = supabase_writer.table('account_snapshot').select('id').order('created_at', desc=True).limit(1).execute()
-        if response.data:
-            latest_id = response.data[0]['id']
-            # Delete all snapshots except the latest
-            supabase_writer.table('account_snapshot').delete().neq('id', latest_id).execute()
-            logger.info("[ACCOUNT] Successfully cleaned up old account snapshots")
+        # Skip echoing the inserted rows back, only the local batch is logged
+        batched_insert('account_snapshot', batch, returning=ReturnMethod.minimal)
+        # Only attach the batch when the record will actually be emitted
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("[ACCOUNT] Account data inserted successfully", extra={'inserted_data': batch})
+    except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+        logger.error(f"[ACCOUNT] Failed to insert account data, keeping it for the next flush: {str(e)}", 
+                   exc_info=True)
+        # The request never reached Supabase, so put the batch back ahead of anything queued since
+        pending[:0] = batch
+        raise
     except Exception as e:
-        logger.error(f"[ACCOUNT] Error cleaning up old account snapshots: {str(e)}")
+        # Part or all of the batch may have been committed, re-sending it could duplicate rows
+        logger.error(f"[ACCOUNT] Failed to insert account data, dropping the batch: {str(e)}", 
+                   extra={'account_data': batch}, 
+                   exc_info=True)
+        raise
+
+def handle_shutdown(signum, frame):
+    """Flush buffered account snapshots before the process exits"""
+    logger.info(f"[ACCOUNT] Received signal {signum}, flushing pending account data")
+    flush_pending()
+    sys.exit(0)
 
-def publish_account_data(force_open=False):
+async def publish_account_data():
     """
-    Fetch and publish account data to Supabase
-    
-    Args:
-        force_open (bool): If True, treat market as open regardless of actual state
+    Fetch and publish account data to Supabase while clock_driver reports the market open
     """
+    global _last_snapshot_hash
     try:
         while True:
-            clock_data = get_market_status()
+            # Wait for the clock driver to report the market open
+            await market_is_open.wait()
+            tick_start = time.monotonic()
             
-            if not clock_data:
-                logger.error("[ACCOUNT] Could not determine market status, waiting 60 seconds before retry")
-                time.sleep(60)
-                continue
+            # Fetch and publish account data
+            logger.info("[ACCOUNT] Fetching account data from Alpaca API")
+            account_data = await call_with_retry(get_account_data)
             
-            if force_open or clock_data['is_open']:
-                # Fetch and publish account data
-                logger.info("[ACCOUNT] Fetching account data from Alpaca API")
-                account_data = get_account_data()
-                account_data['alpaca_id'] = account_data.pop('id')
-                
-                logger.info("[ACCOUNT] Publishing account data to Supabase")
-                try:
-                    data = supabase_writer.table('account_snapshot').insert(account_data).execute()
-                    logger.info("[ACCOUNT] Account data inserted successfully", extra={'inserted_data': data.data})
-                except Exception as e:
-                    logger.error(f"[ACCOUNT] Failed to insert account data: {str(e)}", 
-                               extra={'account_data': account_data}, 
-                               exc_info=True)
-                    raise
-                
-                # When market is open, check every minute
-                time.sleep(60)
+            # Only publish snapshots that differ from the previous one
+            current_hash = snapshot_hash(account_data)
+            if current_hash == _last_snapshot_hash:
+                logger.info("[ACCOUNT] Account data unchanged, skipping publish")
             else:
-                # Clean up old snapshots when market is closed
-                cleanup_old_snapshots()
+                _last_snapshot_hash = current_hash
+                
+                # Stamp the capture time, the database default would give a whole batch its insert time
+                account_data['created_at'] = datetime.now(timezone.utc).isoformat()
                 
-                # When market is closed, sleep until next check
-                time.sleep(60)
+                # Buffer the snapshot and write once a full batch is collected
+                pending.append(account_data)
+                if len(pending) >= BATCH_SIZE:
+                    await asyncio.to_thread(flush_pending)
+            
+            # When market is open, check every minute, not counting the time spent publishing
+            await asyncio.sleep(max(0, 60 - (time.monotonic() - tick_start)))
+            
+            if not market_is_open.is_set():
+                # Write any buffered snapshots once the market has closed
+                await asyncio.to_thread(flush_pending)
 
     except Exception as e:
         logger.error(f"[ACCOUNT] Error in publish_account_data: {str(e)}", exc_info=True)
         raise
+    finally:
+        # Don't drop buffered snapshots when the publisher stops for any reason
+        try:
+            await asyncio.to_thread(flush_pending)
+        except Exception:
+            pass  # Already logged by flush_pending
+
+async def main(force_open=False):
+    """
+    Run the account publisher alongside the clock driver that gates it
+    
+    Args:
+        force_open (bool): If True, treat market as open regardless of actual state
+    """
+    await asyncio.gather(clock_driver(force_open=force_open), publish_account_data())
 
 if __name__ == "__main__":
-    import sys
     force_open = '--force-open' in sys.argv
     
+    # Don't drop buffered snapshots on graceful shutdown
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    
     if force_open:
         logger.info("[ACCOUNT] Market will be treated as open")
         
-    publish_account_data(force_open=force_open) 
\ No newline at end of file
+    asyncio.run(main(force_open=force_open)) 
\ No newline at end of file
@@ -0,0 +1,19 @@
+import os
+import env_bootstrap
+from alpaca.trading.client import TradingClient
+from logger_config import get_logger
+from shared_http import share_alpaca_session
+
+# Get module logger
+logger = get_logger('alpaca_client')
+
+# Initialize clients
+try:
+    ALPACA_API_KEY = os.environ['ALPACA_API_KEY']
+    ALPACA_SECRET_KEY = os.environ['ALPACA_SECRET_KEY']
+except KeyError as e:
+    logger.error(f"Missing required environment variable: {e}")
+    raise
+
+# Trading client shared by every fetcher in the process
+trading_client = share_alpaca_session(TradingClient(ALPACA_API_KEY, ALPACA_SECRET_KEY, paper=True))
\ No newline at end of file
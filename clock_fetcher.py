@@ -1,34 +1,27 @@
-import os
-import logging
-from pythonjsonlogger import jsonlogger
-from dotenv import load_dotenv
-from alpaca.trading.client import TradingClient
+import asyncio
+from datetime import datetime
+from functools import lru_cache
+from alpaca_client import trading_client
+from logger_config import get_logger
+from shared_http import call_with_retry
 
-# Load environment variables (only in development)
-if os.path.exists('.env'):
-    load_dotenv()
+# Get module logger
+logger = get_logger('clock_fetcher')
 
-# Configure logging
-logger = logging.getLogger()
-logHandler = logging.StreamHandler()
-formatter = jsonlogger.JsonFormatter(
-    fmt='%(asctime)s %(levelname)s %(name)s %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-logHandler.setFormatter(formatter)
-logger.addHandler(logHandler)
-logger.setLevel(logging.INFO)
+# Set while the market is open and cleared while it is closed, maintained by clock_driver
+market_is_open = asyncio.Event()
 
-# Initialize clients
-try:
-    ALPACA_API_KEY = os.environ['ALPACA_API_KEY']
-    ALPACA_SECRET_KEY = os.environ['ALPACA_SECRET_KEY']
-except KeyError as e:
-    logger.error(f"Missing required environment variable: {e}")
-    raise
+@lru_cache(maxsize=16)
+def parse_timestamp(timestamp_str):
+    """Parse an ISO timestamp, memoized since the same next_open/next_close strings recur"""
+    return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
 
-# Initialize trading client
-trading_client = TradingClient(ALPACA_API_KEY, ALPACA_SECRET_KEY, paper=True)
+def calculate_sleep_time(next_time_str):
+    """Calculate seconds until the next market event (open or close)"""
+    next_time = parse_timestamp(next_time_str)
+    now = datetime.now(next_time.tzinfo)
+    sleep_seconds = (next_time - now).total_seconds()
+    return max(0, sleep_seconds)  # Ensure we don't return negative sleep time
 
 def get_clock_data(force_open=False):
     """
@@ -50,6 +43,36 @@ def get_clock_data(force_open=False):
         logger.error(f"Error fetching clock data: {str(e)}", exc_info=True)
         raise
 
+async def clock_driver(force_open=False):
+    """
+    Keep market_is_open in sync with the Alpaca clock, fetching it only at market transitions
+    
+    Args:
+        force_open (bool): If True, always treat market as open (for testing)
+    """
+    while True:
+        try:
+            clock_data = await call_with_retry(get_clock_data, force_open=force_open)
+        except Exception as e:
+            # Keep the last known state and try again shortly, rather than stopping every publisher
+            logger.error(f"Error checking market status, retrying in 60 seconds: {str(e)}", exc_info=True)
+            await asyncio.sleep(60)
+            continue
+        
+        if clock_data['is_open']:
+            market_is_open.set()
+            next_transition = clock_data['next_close']
+        else:
+            market_is_open.clear()
+            next_transition = clock_data['next_open']
+        
+        # Sleep until the known transition, re-checking in a minute if it has already passed
+        sleep_time = calculate_sleep_time(next_transition) if next_transition else 0
+        if sleep_time <= 0:
+            sleep_time = 60
+        logger.info(f"Market is {'open' if clock_data['is_open'] else 'closed'}, next clock check in {int(sleep_time)} seconds")
+        await asyncio.sleep(sleep_time)
+
 if __name__ == "__main__":
     # When run directly, show both normal and forced states
     print("\nNormal market state:")
@@ -1,31 +1,19 @@
-import os
+import asyncio
 import time
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from clock_fetcher import get_clock_data
+from clock_fetcher import get_clock_data, calculate_sleep_time
 from logger_config import get_logger
-import logging
-
-# Load environment variables (only in development)
-if os.path.exists('.env'):
-    load_dotenv()
+from shared_http import call_with_retry
+from postgrest.types import ReturnMethod
+from supabase_pool import get_writer
 
 # Get module logger
 logger = get_logger('clock_publisher')
 
-# Disable HTTP request logging
-logging.getLogger('httpx').setLevel(logging.WARNING)
-
-# Initialize Supabase client
-try:
-    SUPABASE_URL = os.environ['SUPABASE_URL']
-    SUPABASE_SERVICE_ROLE_KEY = os.environ['SUPABASE_SERVICE_ROLE_KEY']
-except KeyError as e:
-    logger.error(f"[CLOCK] Missing required environment variable: {e}")
-    raise
+# Seconds between "market opens in" countdown logs while the market is closed
+COUNTDOWN_LOG_INTERVAL = 3600
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# (is_open, next_open, next_close) of the last published snapshot, used to skip unchanged ones
+_last_published: tuple | None = None
 
 def format_time_remaining(seconds):
     """Format seconds into hours, minutes, seconds string"""
@@ -34,28 +22,7 @@ def format_time_remaining(seconds):
     seconds = int(seconds % 60)
     return f"{hours} hours, {minutes} minutes, and {seconds} seconds"
 
-def calculate_sleep_time(next_time_str):
-    """Calculate seconds until the next market event (open)"""
-    next_time = datetime.fromisoformat(next_time_str.replace('Z', '+00:00'))
-    now = datetime.now(next_time.tzinfo)
-    sleep_seconds = (next_time - now).total_seconds()
-    return max(0, sleep_seconds)  # Ensure we don't return negative sleep time
-
-def cleanup_old_snapshots():
-    """Delete all but the most recent clock snapshot when market is closed"""
-    try:
-        logger.info("[CLOCK] Cleaning up old clock snapshots")
-        # Get the latest snapshot ID
-        response = supabase.table('clock_snapshot').select('id').order('created_at', desc=True).limit(1).execute()
-        if response.data:
-            latest_id = response.data[0]['id']
-            # Delete all snapshots except the latest
-            supabase.table('clock_snapshot').delete().neq('id', latest_id).execute()
-            logger.info("[CLOCK] Successfully cleaned up old clock snapshots")
-    except Exception as e:
-        logger.error(f"[CLOCK] Error cleaning up old clock snapshots: {str(e)}")
-
-def publish_clock_data(force_open=False, test_mode=False):
+async def publish_clock_data(force_open=False, test_mode=False):
     """
     Fetch and publish clock data to Supabase
     
@@ -63,14 +30,30 @@ def publish_clock_data(force_open=False, test_mode=False):
         force_open (bool): If True, treat market as open regardless of actual state
         test_mode (bool): If True, run once and exit
     """
+    global _last_published
     try:
         while True:
             # Get clock data and publish to database
             logger.info("[CLOCK] Fetching clock data from Alpaca API")
-            clock_data = get_clock_data(force_open=force_open)
+            clock_data = await call_with_retry(get_clock_data, force_open=force_open)
             
-            logger.info("[CLOCK] Publishing clock data to Supabase")
-            data = supabase.table('clock_snapshot').insert(clock_data).execute()
+            # Only publish when the market state or its schedule has changed
+            published_key = (clock_data['is_open'], clock_data['next_open'], clock_data['next_close'])
+            if published_key == _last_published:
+                logger.info("[CLOCK] Clock data unchanged, skipping publish")
+            else:
+                logger.info("[CLOCK] Publishing clock data to Supabase")
+                await asyncio.to_thread(get_writer().table('clock_snapshot').insert(clock_data, returning=ReturnMethod.minimal).execute)
+                
+                # Keep the single-row status table in step for primary key lookups
+                market_status = {
+                    'id': 1,
+                    'is_open': clock_data['is_open'],
+                    'next_open': clock_data['next_open'],
+                    'next_close': clock_data['next_close']
+                }
+                await asyncio.to_thread(get_writer().table('current_market_status').upsert(market_status, returning=ReturnMethod.minimal).execute)
+                _last_published = published_key
             
             if clock_data['is_open']:
                 # Calculate and log time until market close
@@ -81,12 +64,9 @@ def publish_clock_data(force_open=False, test_mode=False):
                     logger.info("[CLOCK] Test mode - Exiting after successful publish")
                     return clock_data
                     
-                # When market is open, check every minute for unexpected closures
-                time.sleep(60)
+                # Sleep until the scheduled close, re-checking in a minute if it has already passed
+                await asyncio.sleep(time_to_close if time_to_close > 0 else 60)
             else:
-                # Clean up old snapshots when market is closed
-                cleanup_old_snapshots()
-                
                 # When market is closed, calculate sleep time until next open
                 total_sleep_time = calculate_sleep_time(clock_data['next_open'])
                 logger.info(f"[CLOCK] Market is closed. Next open in {format_time_remaining(total_sleep_time)}")
@@ -95,15 +75,19 @@ def publish_clock_data(force_open=False, test_mode=False):
                     logger.info("[CLOCK] Test mode - Exiting as market is closed")
                     return clock_data
                 
-                # Sleep until just before market opens, logging countdown each minute
-                while total_sleep_time > 0:
-                    if total_sleep_time > 60:
-                        time.sleep(60)
-                        total_sleep_time -= 60
-                        logger.info(f"[CLOCK] Market opens in {format_time_remaining(total_sleep_time)}")
-                    else:
-                        time.sleep(total_sleep_time)
-                        break
+                # The scheduled open has passed but the market still reads closed, re-check in a minute
+                if total_sleep_time <= 0:
+                    await asyncio.sleep(60)
+                    continue
+                
+                # Sleep until market opens against a fixed deadline, logging the countdown hourly
+                deadline = time.monotonic() + total_sleep_time
+                remaining = total_sleep_time
+                while remaining > 0:
+                    await asyncio.sleep(min(remaining, COUNTDOWN_LOG_INTERVAL))
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        logger.info(f"[CLOCK] Market opens in {format_time_remaining(remaining)}")
                     
     except Exception as e:
         logger.error(f"[CLOCK] Error: {str(e)}", exc_info=True)
@@ -119,4 +103,4 @@ if __name__ == "__main__":
     if args.force_open:
         logger.info("[CLOCK] Market will be treated as open")
         
-    publish_clock_data(force_open=args.force_open, test_mode=args.test) 
\ No newline at end of file
+    asyncio.run(publish_clock_data(force_open=args.force_open, test_mode=args.test)) 
\ No newline at end of file
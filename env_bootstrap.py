@@ -0,0 +1,9 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables (only in development)
+# Importing this module is enough: Python caches it, so .env is read once per process
+if os.path.exists('.env'):
+    load_dotenv()
+
+_loaded = True
\ No newline at end of file
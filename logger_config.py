@@ -1,23 +1,37 @@
 import logging
+import os
+import env_bootstrap
 from pythonjsonlogger import jsonlogger
 
-# Configure root logger
-logger = logging.getLogger()
+# Whether the root logger has been given our JSON handler yet
+_configured = False
 
-# Remove any existing handlers
-for handler in logger.handlers[:]:
-    logger.removeHandler(handler)
-
-# Add our JSON handler
-logHandler = logging.StreamHandler()
-formatter = jsonlogger.JsonFormatter(
-    fmt='%(asctime)s %(levelname)s %(name)s %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-logHandler.setFormatter(formatter)
-logger.addHandler(logHandler)
-logger.setLevel(logging.INFO)
+def configure_root_logger():
+    """Replace any existing root handlers with a single JSON handler, once per process"""
+    global _configured
+    if _configured:
+        return
+    
+    # Configure root logger
+    logger = logging.getLogger()
+    
+    # Remove any existing handlers
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    
+    # Add our JSON handler
+    logHandler = logging.StreamHandler()
+    formatter = jsonlogger.JsonFormatter(
+        fmt='%(asctime)s %(levelname)s %(name)s %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    logHandler.setFormatter(formatter)
+    logger.addHandler(logHandler)
+    # LOG_LEVEL (e.g. WARNING) silences the per-minute INFO records in production
+    logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+    _configured = True
 
 # Function to get logger for a specific module
 def get_logger(name):
-    return logging.getLogger(name) 
\ No newline at end of file
+    configure_root_logger()
+    return logging.getLogger(name)
\ No newline at end of file
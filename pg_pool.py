@@ -0,0 +1,46 @@
+import os
+import env_bootstrap
+import asyncpg
+from logger_config import get_logger
+
+# Get module logger
+logger = get_logger('pg_pool')
+
+# Direct Postgres connection for bulk writes, through Supavisor's pooled port (6543)
+# Optional: when unset, publishers write through PostgREST instead
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+_pool: asyncpg.Pool | None = None
+
+async def get_pool():
+    """Return the process-wide asyncpg pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        logger.info("Opening Postgres connection pool")
+        _pool = await asyncpg.create_pool(
+            dsn=DATABASE_URL,
+            min_size=1,
+            max_size=3,
+            # Recycle idle connections, Supavisor drops long-lived ones
+            max_inactive_connection_lifetime=1800,
+            # Supavisor's transaction mode can't keep named prepared statements
+            statement_cache_size=0
+        )
+    return _pool
+
+async def copy_rows(table, rows):
+    """
+    Write a list of dicts into a table with a single binary COPY
+    
+    Args:
+        table (str): Table to write into
+        rows (list): Rows sharing the same keys, which are used as the column names
+    """
+    if not rows:
+        return
+    
+    columns = list(rows[0])
+    records = [tuple(row[column] for column in columns) for row in rows]
+    pool = await get_pool()
+    async with pool.acquire() as connection:
+        await connection.copy_records_to_table(table, records=records, columns=columns)
\ No newline at end of file
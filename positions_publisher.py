@@ -1,110 +1,82 @@
+import asyncio
+import json
+import logging
 import os
 import time
-from datetime import datetime
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from datetime import datetime, timezone
+from pathlib import Path
+from clock_fetcher import clock_driver, market_is_open
 from positions_fetcher import get_positions_data
 from logger_config import get_logger
-import logging
-
-# Load environment variables (only in development)
-if os.path.exists('.env'):
-    load_dotenv()
+from pg_pool import DATABASE_URL, copy_rows
+from shared_http import call_with_retry
+from supabase_pool import batched_insert
 
 # Get module logger
 logger = get_logger('positions_publisher')
 
-# Disable HTTP request logging
-logging.getLogger('httpx').setLevel(logging.WARNING)
-
-# Initialize Supabase clients
-try:
-    SUPABASE_URL = os.environ['SUPABASE_URL']
-    SUPABASE_SERVICE_ROLE_KEY = os.environ['SUPABASE_SERVICE_ROLE_KEY']
-    SUPABASE_ANON_KEY = os.environ['NEXT_PUBLIC_SUPABASE_ANON_KEY']
-except KeyError as e:
-    logger.error(f"[POSITIONS] Missing required environment variable: {e}")
-    raise
-
-# Client for reading clock data (public access)
-supabase_reader = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-# Client for writing positions data (authenticated access)
-supabase_writer = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-
-def get_market_status():
-    """Get the current market status from the clock_snapshot table"""
-    try:
-        # Get the latest clock snapshot using anon key
-        logger.info("[POSITIONS] Fetching market status from Supabase")
-        response = supabase_reader.table('clock_snapshot').select('*').order('created_at', desc=True).limit(1).execute()
-        if response.data:
-            return response.data[0]
-        else:
-            logger.error("[POSITIONS] No clock data found in database")
-            return None
-    except Exception as e:
-        logger.error(f"[POSITIONS] Error fetching market status from database: {str(e)}")
-        return None
-
-def cleanup_old_snapshots():
-    """Delete all but the most recent positions snapshot when market is closed"""
-    try:
-        logger.info("[POSITIONS] Cleaning up old positions snapshots")
-        # Get the latest timestamp
-        response = supabase_writer.table('positions_snapshot').select('created_at').order('created_at', desc=True).limit(1).execute()
-        if response.data:
-            latest_timestamp = response.data[0]['created_at']
-            # Delete all positions from earlier timestamps
-            supabase_writer.table('positions_snapshot').delete().lt('created_at', latest_timestamp).execute()
-            logger.info("[POSITIONS] Successfully cleaned up old positions snapshots")
-    except Exception as e:
-        logger.error(f"[POSITIONS] Error cleaning up old positions snapshots: {str(e)}")
+# Where a failed positions payload is dumped when WARREN_DEBUG_DUMP is set
+FAILED_DUMP_PATH = Path('/tmp/warren_failed.json')
 
-def publish_positions_data(force_open=False):
+async def publish_positions_data():
     """
-    Fetch and publish positions data to Supabase
-    
-    Args:
-        force_open (bool): If True, treat market as open regardless of actual state
+    Fetch and publish positions data to Supabase while clock_driver reports the market open
     """
     try:
         while True:
-            clock_data = get_market_status()
+            # Wait for the clock driver to report the market open
+            await market_is_open.wait()
+            tick_start = time.monotonic()
             
-            if not clock_data:
-                logger.error("[POSITIONS] Could not determine market status, waiting 60 seconds before retry")
-                time.sleep(60)
-                continue
+            # Fetch and publish positions data
+            logger.info("[POSITIONS] Fetching positions data from Alpaca API")
+            positions_data = await call_with_retry(get_positions_data)
             
-            if force_open or clock_data['is_open']:
-                # Fetch and publish positions data
-                logger.info("[POSITIONS] Fetching positions data from Alpaca API")
-                positions_data = get_positions_data()
-                
-                logger.info("[POSITIONS] Publishing positions data to Supabase")
-                try:
-                    # Insert new positions data
-                    data = supabase_writer.table('positions_snapshot').insert(positions_data).execute()
-                    logger.info(f"[POSITIONS] Successfully inserted {len(positions_data)} positions", extra={'inserted_data': data.data})
-                except Exception as e:
-                    logger.error(f"[POSITIONS] Failed to insert positions data: {str(e)}", 
-                               extra={'positions_data': positions_data}, 
-                               exc_info=True)
-                    raise
-                
-                # When market is open, check every minute
-                time.sleep(60)
-            else:
-                # Clean up old snapshots when market is closed
-                cleanup_old_snapshots()
-                
-                # When market is closed, sleep until next check
-                time.sleep(60)
+            logger.info("[POSITIONS] Publishing positions data to Supabase")
+            try:
+                # Insert new positions data, with COPY when a direct database connection is configured
+                if DATABASE_URL:
+                    await copy_rows('positions_snapshot', positions_data)
+                    inserted_data = positions_data
+                else:
+                    # Chunks go in as separate requests, so stamp one created_at for the whole snapshot
+                    # rather than letting each chunk's transaction default its own
+                    created_at = datetime.now(timezone.utc).isoformat()
+                    for position in positions_data:
+                        position['created_at'] = created_at
+                    inserted_data = await asyncio.to_thread(batched_insert, 'positions_snapshot', positions_data)
+                # Only attach the rows when the record will actually be emitted
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(f"[POSITIONS] Successfully inserted {len(positions_data)} positions", extra={'inserted_data': inserted_data})
+            except Exception as e:
+                # Log a summary only, serializing every row would bloat the log on repeated failures
+                logger.error(f"[POSITIONS] Failed to insert positions data: {str(e)}", 
+                           extra={
+                               'row_count': len(positions_data),
+                               'first_symbol': positions_data[0]['symbol'] if positions_data else None
+                           }, 
+                           exc_info=True)
+                if os.getenv('WARREN_DEBUG_DUMP'):
+                    FAILED_DUMP_PATH.write_text(json.dumps(positions_data, default=str))
+                    logger.info(f"[POSITIONS] Failed positions data written to {FAILED_DUMP_PATH}")
+                raise
+            
+            # When market is open, check every minute, not counting the time spent publishing
+            await asyncio.sleep(max(0, 60 - (time.monotonic() - tick_start)))
 
     except Exception as e:
         logger.error(f"[POSITIONS] Error in publish_positions_data: {str(e)}", exc_info=True)
         raise
 
+async def main(force_open=False):
+    """
+    Run the positions publisher alongside the clock driver that gates it
+    
+    Args:
+        force_open (bool): If True, treat market as open regardless of actual state
+    """
+    await asyncio.gather(clock_driver(force_open=force_open), publish_positions_data())
+
 if __name__ == "__main__":
     import sys
     force_open = '--force-open' in sys.argv
@@ -112,4 +84,4 @@ if __name__ == "__main__":
     if force_open:
         logger.info("[POSITIONS] Market will be treated as open")
         
-    publish_positions_data(force_open=force_open) 
\ No newline at end of file
+    asyncio.run(main(force_open=force_open)) 
\ No newline at end of file
@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import signal
+from logger_config import get_logger
+
+# Get module logger
+logger = get_logger('publisher_main')
+
+# Seconds to wait before restarting a publisher that failed
+RESTART_DELAY = 60
+
+async def supervise(name, publisher, *args, **kwargs):
+    """
+    Run a publisher coroutine function, restarting it after a failure
+    
+    Keeps one publisher's failure (an Alpaca retry give-up, a failed insert) from stopping the others.
+    """
+    while True:
+        try:
+            return await publisher(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"[MAIN] {name} publisher failed, restarting in {RESTART_DELAY} seconds: {str(e)}", exc_info=True)
+            await asyncio.sleep(RESTART_DELAY)
+
+async def main(force_open=False):
+    """
+    Run every publisher in one event loop, sharing the Alpaca and Supabase clients
+    
+    Args:
+        force_open (bool): If True, treat market as open regardless of actual state
+    """
+    # Imported here so argument parsing (e.g. --help) doesn't load alpaca-py and supabase
+    from clock_fetcher import clock_driver
+    from account_publisher import publish_account_data, handle_shutdown
+    from clock_publisher import publish_clock_data
+    from positions_publisher import publish_positions_data
+    
+    # Don't drop buffered account snapshots on graceful shutdown
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    
+    await asyncio.gather(
+        clock_driver(force_open=force_open),
+        supervise('account', publish_account_data),
+        supervise('clock', publish_clock_data, force_open=force_open),
+        supervise('positions', publish_positions_data)
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Warren bot publishers')
+    parser.add_argument('--force-open', action='store_true', help='Force market to be treated as open')
+    args = parser.parse_args()
+    
+    if args.force_open:
+        logger.info("[MAIN] Market will be treated as open")
+        
+    asyncio.run(main(force_open=args.force_open))
\ No newline at end of file
@@ -0,0 +1,94 @@
+import asyncio
+import gzip
+import logging
+import os
+import env_bootstrap
+import httpx
+from requests import Session
+from requests.adapters import HTTPAdapter
+from postgrest.utils import SyncClient
+from tenacity import AsyncRetrying, before_sleep_log, stop_after_delay, wait_random_exponential
+from logger_config import get_logger
+
+# Get module logger
+logger = get_logger('shared_http')
+
+# Keep-alive session shared by every Alpaca TradingClient in the process
+session = Session()
+adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+session.mount('https://', adapter)
+
+# Opt-in gzip compression of PostgREST request bodies, for endpoints that accept Content-Encoding: gzip
+GZIP_REQUESTS = os.environ.get('SUPABASE_GZIP_REQUESTS', '').lower() in ('1', 'true', 'yes')
+
+# Smallest request body worth compressing, in bytes
+GZIP_MIN_SIZE = 1024
+
+class GzipRequestTransport(httpx.BaseTransport):
+    """Transport wrapper that gzip-compresses request bodies of at least min_size bytes"""
+    
+    def __init__(self, wrapped, min_size=GZIP_MIN_SIZE):
+        self.wrapped = wrapped
+        self.min_size = min_size
+    
+    def handle_request(self, request):
+        body = request.read()
+        if len(body) >= self.min_size and 'Content-Encoding' not in request.headers:
+            headers = request.headers.copy()
+            headers['Content-Encoding'] = 'gzip'
+            # Let httpx recompute Content-Length for the compressed body
+            del headers['Content-Length']
+            request = httpx.Request(
+                request.method,
+                request.url,
+                headers=headers,
+                content=gzip.compress(body),
+                extensions=request.extensions
+            )
+        return self.wrapped.handle_request(request)
+    
+    def close(self):
+        self.wrapped.close()
+
+# Keep-alive transport shared by every Supabase PostgREST client in the process
+transport = httpx.HTTPTransport(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+)
+if GZIP_REQUESTS:
+    transport = GzipRequestTransport(transport)
+
+def share_alpaca_session(trading_client):
+    """Route an Alpaca TradingClient's requests through the shared session"""
+    trading_client._session.close()
+    trading_client._session = session
+    return trading_client
+
+def share_supabase_transport(supabase_client):
+    """Route a Supabase client's PostgREST requests through the shared transport"""
+    postgrest = supabase_client.postgrest
+    default_session = postgrest.session
+    # Keep the client's own base URL and auth headers, only the connection pool is shared
+    postgrest.session = SyncClient(
+        base_url=default_session.base_url,
+        headers=default_session.headers,
+        timeout=default_session.timeout,
+        transport=transport
+    )
+    default_session.close()
+    return supabase_client
+
+async def call_with_retry(fn, *args, **kwargs):
+    """
+    Run a blocking API call in a worker thread, retrying failures with jittered exponential backoff
+    
+    The event loop keeps serving the other publishers while a call is waiting to be retried.
+    """
+    async for attempt in AsyncRetrying(
+        wait=wait_random_exponential(multiplier=0.5, max=8),
+        stop=stop_after_delay(15),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True
+    ):
+        with attempt:
+            return await asyncio.to_thread(fn, *args, **kwargs)
\ No newline at end of file
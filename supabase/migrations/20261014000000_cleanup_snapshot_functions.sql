@@ -0,0 +1,48 @@
+-- Keep only the latest snapshot in each table with one statement, so a snapshot
+-- inserted between finding the latest row and deleting the rest can't be lost.
+-- Each function returns how many rows it deleted.
+
+create or replace function cleanup_account_snapshots()
+returns table (deleted_count integer)
+language sql
+as $$
+  with deleted as (
+    delete from account_snapshot
+    where id <> (select id from account_snapshot order by created_at desc limit 1)
+    returning 1
+  )
+  select count(*)::integer from deleted;
+$$;
+
+create or replace function cleanup_clock_snapshots()
+returns table (deleted_count integer)
+language sql
+as $$
+  with deleted as (
+    delete from clock_snapshot
+    where id <> (select id from clock_snapshot order by created_at desc limit 1)
+    returning 1
+  )
+  select count(*)::integer from deleted;
+$$;
+
+-- A positions snapshot is every row sharing the latest created_at
+create or replace function cleanup_positions_snapshots()
+returns table (deleted_count integer)
+language sql
+as $$
+  with deleted as (
+    delete from positions_snapshot
+    where created_at < (select max(created_at) from positions_snapshot)
+    returning 1
+  )
+  select count(*)::integer from deleted;
+$$;
+
+-- Only the bot's service role may prune snapshots
+revoke execute on function cleanup_account_snapshots() from public, anon, authenticated;
+revoke execute on function cleanup_clock_snapshots() from public, anon, authenticated;
+revoke execute on function cleanup_positions_snapshots() from public, anon, authenticated;
+grant execute on function cleanup_account_snapshots() to service_role;
+grant execute on function cleanup_clock_snapshots() to service_role;
+grant execute on function cleanup_positions_snapshots() to service_role;
@@ -0,0 +1,14 @@
+-- Prune snapshots inside the database instead of from the publishers. Every 10
+-- minutes while the latest clock snapshot says the market is closed, keep only
+-- the latest row of each snapshot table; intraday history is left alone.
+
+create extension if not exists pg_cron;
+
+select cron.schedule(
+  'snapshot_retention',
+  '*/10 * * * *',
+  $$
+  select cleanup_account_snapshots(), cleanup_clock_snapshots(), cleanup_positions_snapshots()
+  where not coalesce((select is_open from clock_snapshot order by created_at desc limit 1), false)
+  $$
+);
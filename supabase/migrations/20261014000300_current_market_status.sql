@@ -0,0 +1,28 @@
+-- Single-row market status, upserted by the clock publisher whenever the market
+-- state or schedule changes. Readers fetch it by primary key instead of sorting
+-- clock_snapshot by created_at for its latest row.
+
+create table if not exists current_market_status (
+  id integer primary key default 1 check (id = 1),
+  is_open boolean not null,
+  next_open timestamptz,
+  next_close timestamptz
+);
+
+alter table current_market_status enable row level security;
+
+drop policy if exists "Market status is publicly readable" on current_market_status;
+create policy "Market status is publicly readable"
+  on current_market_status for select
+  using (true);
+
+-- Gate the retention job on the status row too. Scheduling under the same name
+-- replaces the existing job.
+select cron.schedule(
+  'snapshot_retention',
+  '*/10 * * * *',
+  $$
+  select cleanup_account_snapshots(), cleanup_clock_snapshots(), cleanup_positions_snapshots()
+  where not coalesce((select is_open from current_market_status where id = 1), false)
+  $$
+);
@@ -0,0 +1,75 @@
+import os
+import env_bootstrap
+import logging
+from functools import lru_cache
+from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from logger_config import get_logger
+from shared_http import share_supabase_transport
+
+# Get module logger
+logger = get_logger('supabase_pool')
+
+# Disable HTTP request logging
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+# Initialize Supabase client
+try:
+    SUPABASE_URL = os.environ['SUPABASE_URL']
+    SUPABASE_SERVICE_ROLE_KEY = os.environ['SUPABASE_SERVICE_ROLE_KEY']
+except KeyError as e:
+    logger.error(f"Missing required environment variable: {e}")
+    raise
+
+# Seconds before a PostgREST request is abandoned
+POSTGREST_TIMEOUT = 30
+
+# Most rows sent in a single insert request, PostgreSQL gains little from larger batches
+INSERT_BATCH_SIZE = 1000
+
+# SQLSTATE classes of errors caused by the rows themselves: data exceptions and constraint violations
+_ROW_ERROR_CLASSES = ('22', '23')
+
+def _create_pooled_client(key):
+    """Create a Supabase client whose PostgREST requests go through the shared transport"""
+    # Fresh options per client, the create_client default is shared and would mix up auth headers
+    options = ClientOptions(postgrest_client_timeout=POSTGREST_TIMEOUT)
+    return share_supabase_transport(create_client(SUPABASE_URL, key, options=options))
+
+@lru_cache(maxsize=None)
+def get_writer() -> Client:
+    """Client for writing snapshots (authenticated access), created once per process"""
+    return _create_pooled_client(SUPABASE_SERVICE_ROLE_KEY)
+
+def batched_insert(table, rows, size=INSERT_BATCH_SIZE, returning=ReturnMethod.representation):
+    """
+    Insert rows into a table through the writer client, one request per chunk of at most size rows
+    
+    A chunk rejected for its data is retried row by row so the offending row is logged before the error
+    is re-raised. Any other failure (timeout, server error) is re-raised as-is, since the chunk may have
+    been committed and a retry would duplicate it.
+    
+    Returns:
+        list: The inserted rows as returned by PostgREST (empty when returning is minimal)
+    """
+    inserted = []
+    for i in range(0, len(rows), size):
+        chunk = rows[i:i + size]
+        try:
+            inserted.extend(get_writer().table(table).insert(chunk, returning=returning).execute().data)
+        except APIError as e:
+            # code is the bare HTTP status (an int) when the error body wasn't JSON, e.g. a gateway 502 page
+            if not str(e.code or '').startswith(_ROW_ERROR_CLASSES):
+                raise
+            logger.warning(f"Insert of {len(chunk)} rows into {table} failed, retrying row by row: {str(e)}")
+            for row in chunk:
+                try:
+                    inserted.extend(get_writer().table(table).insert(row, returning=returning).execute().data)
+                except APIError as row_error:
+                    logger.error(f"Row rejected by {table}: {str(row_error)}", extra={'row': row})
+                    raise
+            # Every row went in on its own, keep the chunk's rejection visible rather than dropping it
+            logger.error(f"Insert of {len(chunk)} rows into {table} was rejected but each row was accepted on its own: {str(e)}")
+    return inserted